@@ -1,21 +1,38 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Form, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipResponder
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
 import uuid
 from datetime import datetime, timedelta
 import bcrypt
 import jwt
 import shutil
 import re
+import asyncio
+import gzip
+import json
+import math
+import time
+import socket
+from collections import OrderedDict
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -25,8 +42,18 @@ UPLOAD_DIR = ROOT_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 # MongoDB connection
+# Motor connects lazily; the pool is opened and warmed up in lifespan before the worker reports ready
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+client = AsyncIOMotorClient(
+    mongo_url,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    connectTimeoutMS=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    waitQueueTimeoutMS=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000')),
+)
 db = client[os.environ['DB_NAME']]
 
 # JWT settings
@@ -34,8 +61,64 @@ SECRET_KEY = "ultra_modern_film_site_secret_key_2025_tr"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 720  # 12 hours
 
+# Cache coherence settings
+# "auto" tries change streams and falls back to version polling, "stream" / "poll" force one mode
+CACHE_COHERENCE_MODE = os.environ.get('CACHE_COHERENCE_MODE', 'auto')
+CACHE_POLL_INTERVAL = float(os.environ.get('CACHE_POLL_INTERVAL', '2'))
+CACHE_RETRY_DELAY = float(os.environ.get('CACHE_RETRY_DELAY', '1'))
+
+# Sequence numbers reserved longer ago than this belong to a writer that died
+PENDING_WRITE_TIMEOUT = float(os.environ.get('PENDING_WRITE_TIMEOUT', '60'))
+
+# Maximum number of ids accepted by /api/filmler/toplu
+BATCH_LOOKUP_LIMIT = int(os.environ.get('BATCH_LOOKUP_LIMIT', '100'))
+
+# Online migration settings
+MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', '200'))
+MIGRATION_BATCH_DELAY = float(os.environ.get('MIGRATION_BATCH_DELAY', '0.5'))
+MIGRATION_LEASE_SECONDS = float(os.environ.get('MIGRATION_LEASE_SECONDS', '60'))
+
+# Rate limiting settings
+# "memory" keeps buckets per worker, "mongo" shares them between workers and hosts
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+# Number of our own proxies in front of the app that append to X-Forwarded-For; 0 ignores the header
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '0'))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '5'))
+
+# Compression settings
+GZIP_MINIMUM_SIZE = int(os.environ.get('GZIP_MINIMUM_SIZE', '1000'))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+# Search queries are unbounded, so they get their own cache and cannot push out the homepage lists
+SEARCH_RESPONSE_CACHE_SIZE = int(os.environ.get('SEARCH_RESPONSE_CACHE_SIZE', '128'))
+
+# Background job settings
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', '2'))
+JOB_PROCESS_WORKERS = int(os.environ.get('JOB_PROCESS_WORKERS', '2'))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '2'))
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '60'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE = float(os.environ.get('JOB_RETRY_BASE', '5'))
+JOB_RETRY_MAX = float(os.environ.get('JOB_RETRY_MAX', '900'))
+JOB_DRAIN_TIMEOUT = float(os.environ.get('JOB_DRAIN_TIMEOUT', '20'))
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', str(7 * 86400)))  # Finished jobs are kept this long
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Startup warm-up settings; STARTUP_WARMUP=false skips pool and cache warm-up (for measurements),
+# indexes are created either way
+STARTUP_WARMUP = os.environ.get('STARTUP_WARMUP', 'true').lower() == 'true'
+WARMUP_RETRY_DELAY = float(os.environ.get('WARMUP_RETRY_DELAY', '2'))
+# A worker whose warm-up keeps failing still reports ready, just with cold caches
+WARMUP_ATTEMPTS = int(os.environ.get('WARMUP_ATTEMPTS', '3'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    yield
+    await shutdown()
+
 # Create the main app
-app = FastAPI(title="Ultra Sinema API")
+app = FastAPI(title="Ultra Sinema API", lifespan=lifespan)
 
 # Security
 security = HTTPBearer()
@@ -60,6 +143,28 @@ def extract_youtube_id(url):
             return match.group(1)
     return None
 
+# Turkish-aware folding for genre and cast lookups
+TURKISH_FOLD = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+
+def normalize_term(text: str) -> str:
+    """Lowercase with Turkish dotted/dotless I rules and fold to ASCII, e.g. 'BİLİM Kurgu' -> 'bilim kurgu'"""
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    return " ".join(text.translate(TURKISH_FOLD).split())
+
+def split_terms(text: Optional[str]) -> List[str]:
+    """Split a free-text genre or cast string ('Aksiyon, Macera') into normalized terms"""
+    if not text:
+        return []
+    terms = []
+    for part in re.split(r"[,/|;]", text):
+        term = normalize_term(part)
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+def normalized_movie_fields(tur: Optional[str], oyuncular: Optional[str]) -> dict:
+    return {"turler": split_terms(tur), "oyuncu_listesi": split_terms(oyuncular)}
+
 # Models
 class Movie(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -86,6 +191,10 @@ class Movie(BaseModel):
     premium: bool = False  # Premium content
     yaş_siniri: Optional[str] = None  # Age rating
     olusturulma_tarihi: datetime = Field(default_factory=datetime.utcnow)
+    guncelleme_tarihi: Optional[datetime] = None  # Last write time
+    sira: int = 0  # Catalog sequence number of the last write
+    turler: List[str] = []  # Normalized genres, derived from tur
+    oyuncu_listesi: List[str] = []  # Normalized cast, derived from oyuncular
 
 class MovieCreate(BaseModel):
     baslik: str
@@ -166,6 +275,22 @@ class SiteSettings(BaseModel):
     iletişim_email: Optional[str] = None
     guncelleme_tarihi: datetime = Field(default_factory=datetime.utcnow)
 
+class MovieChanges(BaseModel):
+    sira: int  # Pass as `since` on the next call
+    filmler: List[Movie]  # Created or updated movies
+    silinenler: List[str]  # Ids of deleted movies
+    devami_var: bool = False  # More changes are waiting, call again with `sira` (or `imlec`)
+    tam: bool = False  # Full sync: replaces the client's copy instead of patching it
+    imlec: Optional[str] = None  # Cursor for the next page of a full sync
+
+class MovieBatchRequest(BaseModel):
+    idler: List[str]
+    alanlar: Optional[List[str]] = None  # Fields to return, all of them when empty
+
+class MovieBatch(BaseModel):
+    filmler: List[dict]  # In the requested order
+    bulunamayanlar: List[str]  # Requested ids without a movie
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -177,6 +302,31 @@ class Genre(BaseModel):
     resim: Optional[str] = None  # Image
     aktif: bool = True
 
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tur: str  # Registered job handler name
+    parametreler: Dict[str, Any] = {}
+    durum: str = "bekliyor"  # "bekliyor", "calisiyor", "tamamlandi" or "basarisiz"
+    oncelik: int = 0  # Higher runs first
+    deneme: int = 0  # Attempts started so far
+    max_deneme: int = JOB_MAX_ATTEMPTS
+    ilerleme: float = 0  # Progress, 0-100
+    mesaj: Optional[str] = None  # Last progress message
+    hata: Optional[str] = None  # Last error
+    sonuc: Optional[Dict[str, Any]] = None  # Result of a finished job
+    tekil_anahtar: Optional[str] = None  # Deduplication key for periodic jobs
+    kilit_sahibi: Optional[str] = None  # Worker holding the lease
+    kilit_bitis: Optional[datetime] = None  # Lease expiry
+    sonraki_deneme: datetime = Field(default_factory=datetime.utcnow)  # Not run before this
+    olusturulma_tarihi: datetime = Field(default_factory=datetime.utcnow)
+    guncelleme_tarihi: datetime = Field(default_factory=datetime.utcnow)
+    bitis_tarihi: Optional[datetime] = None  # When the job finished; removed JOB_RETENTION_SECONDS later
+
+class JobCreate(BaseModel):
+    tur: str
+    parametreler: Dict[str, Any] = {}
+    oncelik: int = 0
+
 # Helper functions
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -204,6 +354,981 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# Local caches
+class LocalCache:
+    """Per-process cache for documents read on every request (settings, movies).
+
+    Every invalidation moves to a new generation. A reader captures the generation
+    before querying MongoDB and passes it to set, so a document read before a
+    concurrent invalidation is dropped instead of being cached indefinitely.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.generation = 0
+        self._items = {}
+
+    def get(self, key):
+        return self._items.get(key)
+
+    def set(self, key, value, generation: Optional[int] = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._items[key] = value
+
+    def invalidate(self, key):
+        self.generation += 1
+        self._items.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._items.clear()
+
+settings_cache = LocalCache("settings")
+movie_cache = LocalCache("movies")
+
+class ResponseCache(LocalCache):
+    """Encoded (and compressed) catalog response bodies, keyed by path, query and encoding"""
+
+    def __init__(self, name: str, max_items: int):
+        super().__init__(name)
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value, generation: Optional[int] = None):
+        super().set(key, value, generation)
+        if len(self._items) > self.max_items:
+            # Least recently used first
+            self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        # A change to any one movie can show up in every cached list
+        self.clear()
+
+catalog_response_cache = ResponseCache("catalog_responses", RESPONSE_CACHE_SIZE)
+search_response_cache = ResponseCache("search_responses", SEARCH_RESPONSE_CACHE_SIZE)
+
+# Which local caches have to be dropped when a collection changes
+COHERENCE_COLLECTIONS = {
+    "movies": [movie_cache, catalog_response_cache, search_response_cache],
+    "settings": [settings_cache],
+}
+
+# Response caches this worker drops as soon as it writes to a collection itself
+RESPONSE_CACHES = {
+    "movies": [catalog_response_cache, search_response_cache],
+}
+
+async def bump_version(collection: str):
+    """Record a completed write so that workers without change streams notice it while polling.
+
+    Only call this once the write has landed: it also drops this worker's response caches,
+    and a response rendered before the write must not be cached under the new version.
+    """
+    await db.versions.update_one({"_id": collection}, {"$inc": {"surum": 1}}, upsert=True)
+    # Other workers hear about it through CacheCoherence, this one must not wait for that
+    for cache in RESPONSE_CACHES.get(collection, []):
+        cache.clear()
+
+async def reserve_sequence(collection: str, count: int = 1) -> int:
+    """Reserve `count` consecutive sequence numbers and return the first one.
+
+    The reservation is recorded as pending until release_sequence, which holds the
+    delta-sync watermark below it: a client must never move past a write that has not landed.
+    """
+    version = await db.versions.find_one_and_update(
+        {"_id": collection},
+        [
+            {"$set": {"sira": {"$add": [{"$ifNull": ["$sira", 0]}, count]}}},
+            {"$set": {"bekleyen": {"$concatArrays": [
+                {"$ifNull": ["$bekleyen", []]},
+                [{"sira": {"$subtract": ["$sira", count - 1]}, "zaman": "$$NOW"}],
+            ]}}},
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return version["sira"] - count + 1
+
+async def release_sequence(collection: str, first: int):
+    cutoff = datetime.utcnow() - timedelta(seconds=PENDING_WRITE_TIMEOUT)
+    await db.versions.update_one(
+        {"_id": collection},
+        {"$pull": {"bekleyen": {"$or": [{"sira": first}, {"zaman": {"$lt": cutoff}}]}}},
+    )
+    await bump_version(collection)
+
+async def safe_sequence(collection: str) -> int:
+    """Highest sequence number below which every write has landed"""
+    version = await db.versions.find_one({"_id": collection}) or {}
+    cutoff = datetime.utcnow() - timedelta(seconds=PENDING_WRITE_TIMEOUT)
+    pending = [entry["sira"] for entry in version.get("bekleyen", []) if entry["zaman"] >= cutoff]
+    if pending:
+        return min(pending) - 1
+    return version.get("sira", 0)
+
+@asynccontextmanager
+async def movie_write(count: int = 1):
+    """Wrap writes to movie documents; yields the first of `count` reserved sequence numbers"""
+    first = await reserve_sequence("movies", count)
+    try:
+        yield first
+    finally:
+        await release_sequence("movies", first)
+
+def movie_change_stamp(sira: int) -> dict:
+    """Fields every write to a movie document has to $set for delta sync"""
+    return {"sira": sira, "guncelleme_tarihi": datetime.utcnow()}
+
+class CacheCoherence:
+    """Keeps local caches of every worker in sync with admin writes made on other workers.
+
+    Tails a change stream on the watched collections and resumes from the last seen token
+    after a disconnect. When change streams are unavailable (standalone mongod) it falls
+    back to polling the counters written by bump_version.
+    """
+
+    def __init__(self, database, collections: dict, mode: str = "auto"):
+        self.db = database
+        self.collections = collections
+        self.mode = mode
+        self.resume_token = None
+        # A collection without a versions document has never been written to: version 0
+        self.versions = {collection: 0 for collection in collections}
+        self.active_mode = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def invalidate(self, collection: str, key: Optional[str] = None):
+        for cache in self.collections.get(collection, []):
+            if key is None:
+                cache.clear()
+            else:
+                cache.invalidate(key)
+
+    def invalidate_all(self):
+        for collection in self.collections:
+            self.invalidate(collection)
+
+    async def _run(self):
+        if self.mode != "poll":
+            try:
+                await self._watch()
+                return
+            except OperationFailure as e:
+                if self.mode == "stream":
+                    raise
+                logger.warning(f"Change stream kullanılamıyor, sürüm yoklamasına geçiliyor: {e}")
+        await self._poll()
+
+    async def _watch(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(self.collections)},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        while True:
+            try:
+                async with self.db.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=self.resume_token,
+                ) as stream:
+                    if self.active_mode != "stream":
+                        # Anything may have changed while we were not listening
+                        self.invalidate_all()
+                        self.active_mode = "stream"
+                    async for change in stream:
+                        self._apply(change)
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                # 286 = ChangeStreamHistoryLost, 260 = InvalidResumeToken
+                if e.code in (286, 260) and self.resume_token is not None:
+                    logger.warning("Change stream devam noktası kayboldu, önbellekler temizleniyor")
+                    self.resume_token = None
+                    self.active_mode = None
+                    continue
+                raise
+            except PyMongoError as e:
+                logger.warning(f"Change stream bağlantısı koptu, yeniden bağlanılıyor: {e}")
+                self.active_mode = None
+                await asyncio.sleep(CACHE_RETRY_DELAY)
+
+    def _apply(self, change: dict):
+        collection = change["ns"]["coll"]
+        document = change.get("fullDocument") or {}
+        if change["operationType"] == "delete" or "id" not in document:
+            # Deletes only carry the Mongo _id, not our id, so drop the whole cache
+            self.invalidate(collection)
+        elif collection == "settings":
+            self.invalidate(collection)
+        else:
+            self.invalidate(collection, document["id"])
+
+    async def _poll(self):
+        self.active_mode = "poll"
+        while True:
+            try:
+                async for version in self.db.versions.find({"_id": {"$in": list(self.collections)}}):
+                    if self.versions[version["_id"]] != version["surum"]:
+                        self.invalidate(version["_id"])
+                        self.versions[version["_id"]] = version["surum"]
+            except PyMongoError as e:
+                logger.warning(f"Sürüm yoklaması başarısız: {e}")
+            await asyncio.sleep(CACHE_POLL_INTERVAL)
+
+cache_coherence = CacheCoherence(db, COHERENCE_COLLECTIONS, CACHE_COHERENCE_MODE)
+
+# Rate limiting and admission control
+# Route class -> (tokens per second, burst)
+RATE_LIMITS = {
+    "giris": (5 / 60, 5),  # Login and registration, per account and client: 5 per minute
+    "giris_istemci": (30 / 60, 30),  # All logins of one client, whichever accounts it tries
+    "ara": (1, 10),  # Search
+    "admin": (5, 30),  # Admin writes and uploads
+    "genel": (20, 60),  # Everything else
+}
+
+# Expensive endpoint -> (concurrent requests, queued requests)
+CONCURRENCY_LIMITS = {
+    "/api/ara": (8, 32),
+    "/api/filmler": (16, 64),
+    "/api/turler": (4, 16),
+    "/api/filmler/degisiklikler": (4, 16),
+}
+
+# Login bodies are tiny; anything larger is only limited per client
+LOGIN_BODY_LIMIT = 16 * 1024
+
+def login_account(path: str, body: bytes) -> str:
+    """Account a login or registration request is for, so lockouts stay scoped to it"""
+    if path == "/api/admin/giris":
+        return "admin"
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return ""
+    name = data.get("kullanici_adi") if isinstance(data, dict) else None
+    return str(name).strip().lower()[:100] if name else ""
+
+def route_class(path: str) -> str:
+    if path in ("/api/giris", "/api/admin/giris", "/api/kayit"):
+        return "giris"
+    if path == "/api/ara":
+        return "ara"
+    if path.startswith("/api/admin/"):
+        return "admin"
+    return "genel"
+
+class MemoryRateLimitBackend:
+    """Token buckets kept in this worker's memory; the least recently used are dropped first"""
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; returns 0 when allowed, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / rate
+
+class MongoRateLimitBackend:
+    """Token buckets shared by all workers, updated atomically with a pipeline update"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        refilled = {"$min": [burst, {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$ts", now]}]}, rate]},
+        ]}]}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "ts": now, "son_erisim": "$$NOW"}},
+                {"$set": {
+                    "izin": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return 0 if bucket["izin"] else (1 - bucket["tokens"]) / rate
+
+class ConcurrencyLimiter:
+    """Caps concurrent requests to one endpoint, queues a bounded number and sheds the rest"""
+
+    def __init__(self, limit: int, queue: int):
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active >= self.limit and self.waiting >= self.queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-client token buckets and per-endpoint concurrency caps"""
+
+    def __init__(self, app, backend, limits: dict, concurrency: dict):
+        self.app = app
+        self.backend = backend
+        self.limits = limits
+        self.limiters = {path: ConcurrencyLimiter(*limit) for path, limit in concurrency.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        
+        path = scope["path"]
+        rate_class = route_class(path)
+        client_id = self.client_id(scope)
+        buckets = [(f"{rate_class}:{client_id}", rate_class)]
+        if rate_class == "giris":
+            body, receive = await self.buffer_body(receive)
+            account = login_account(path, body) if len(body) <= LOGIN_BODY_LIMIT else ""
+            buckets = [(f"giris:{account}:{client_id}", "giris"), (f"giris_istemci:{client_id}", "giris_istemci")]
+        try:
+            retry_after = 0
+            for key, limit_class in buckets:
+                retry_after = await self.backend.take(key, *self.limits[limit_class])
+                if retry_after:
+                    break
+        except PyMongoError as e:
+            # A broken shared backend must not take the whole API down with it
+            logger.warning(f"Hız sınırı deposuna erişilemedi: {e}")
+            retry_after = 0
+        if retry_after:
+            await self.reject(send, 429, "Çok fazla istek, lütfen daha sonra tekrar deneyin", retry_after)
+            return
+        
+        limiter = self.limiters.get(path)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limiter.acquire(ADMISSION_QUEUE_TIMEOUT):
+            await self.reject(send, 503, "Sunucu yoğun, lütfen daha sonra tekrar deneyin", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def buffer_body(receive):
+        """Read the request body and return it with a receive that replays it to the app"""
+        messages = []
+        body = b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        
+        async def replay():
+            if messages:
+                return messages.pop(0)
+            return await receive()
+        
+        return body, replay
+
+    @staticmethod
+    def client_id(scope) -> str:
+        if TRUSTED_PROXY_HOPS:
+            # Entries left of the ones our proxies appended are whatever the client sent
+            forwarded = [
+                address.strip()
+                for name, value in scope["headers"] if name == b"x-forwarded-for"
+                for address in value.decode("latin-1").split(",")
+            ]
+            if len(forwarded) >= TRUSTED_PROXY_HOPS:
+                return forwarded[-TRUSTED_PROXY_HOPS]
+        client_addr = scope.get("client")
+        return client_addr[0] if client_addr else "bilinmeyen"
+
+    @staticmethod
+    async def reject(send, status_code: int, detail: str, retry_after: float):
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+if RATE_LIMIT_BACKEND == "mongo":
+    rate_limit_backend = MongoRateLimitBackend(db.rate_limits)
+else:
+    rate_limit_backend = MemoryRateLimitBackend()
+
+# Compression and cached catalog responses
+# Cached response paths and the cache each one is stored in
+CACHEABLE_PATHS = {
+    "/api/filmler": catalog_response_cache,
+    "/api/populer-filmler": catalog_response_cache,
+    "/api/yeni-filmler": catalog_response_cache,
+    "/api/turler": catalog_response_cache,
+    "/api/ara": search_response_cache,
+}
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether gzip is acceptable; honours q-values and lets an explicit gzip entry override *"""
+    gzip_q = None
+    wildcard_q = None
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if coding == "gzip":
+            gzip_q = q
+        elif coding == "*":
+            wildcard_q = q
+    q = gzip_q if gzip_q is not None else wildcard_q
+    return q is not None and q > 0
+
+class ApiGZipMiddleware:
+    """GZip for API responses; uploaded media is already compressed and streamed.
+
+    Negotiates with accepts_gzip, the same check the response cache keys on.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 9):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["path"].startswith("/api/") and not scope["path"].startswith("/api/dosyalar/")
+            and accepts_gzip(Headers(scope=scope).get("accept-encoding", ""))
+        ):
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+class CatalogResponseCacheMiddleware:
+    """Serves repeat catalog GETs from encoded bodies, compressed once per cache generation.
+
+    Sits inside ApiGZipMiddleware, which leaves responses alone once Content-Encoding is set.
+    """
+
+    def __init__(self, app, caches: dict):
+        self.app = app
+        self.caches = caches
+
+    async def __call__(self, scope, receive, send):
+        cache = self.caches.get(scope["path"]) if scope["type"] == "http" else None
+        if cache is None or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = "gzip" if accepts_gzip(Headers(scope=scope).get("accept-encoding", "")) else "identity"
+        generation = cache.generation
+        key = (scope["path"], scope["query_string"], encoding)
+        cached = cache.get(key)
+        cache_status = b"HIT"
+        if cached is None:
+            cache_status = b"MISS"
+            cached = await self._render(scope, receive, encoding)
+            if cached is None:
+                return
+            if cached[0] == 200:
+                # Dropped if the catalog changed while the response was rendered
+                cache.set(key, cached, generation)
+        
+        status_code, headers, body = cached
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": headers + [(b"x-cache", cache_status)],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _render(self, scope, receive, encoding: str):
+        # Ask the app for the plain body; compression happens here, once
+        scope = dict(scope, headers=[(k, v) for k, v in scope["headers"] if k != b"accept-encoding"])
+        start = {}
+        chunks = []
+        
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+        
+        await self.app(scope, receive, capture)
+        if not start:
+            return None
+        body = b"".join(chunks)
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        if encoding == "gzip" and len(body) >= GZIP_MINIMUM_SIZE:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(body))
+        headers.add_vary_header("Accept-Encoding")
+        return start["status"], headers.raw, body
+
+# Background jobs
+JOB_HANDLERS = {}
+
+def job_handler(name: str, parametreler: type = None, cpu: bool = False):
+    """Register a job handler.
+
+    `parametreler` is the model its parameters are validated against, both when the job is
+    enqueued and again before it runs. Async handlers are called as handler(context, **parametreler).
+    CPU-bound handlers (cpu=True) must be plain module-level functions; they run in the process
+    pool as handler(**parametreler) and cannot report intermediate progress. A pool process cannot
+    be interrupted, so when such a job is cancelled (drain, lost lease) the handler still runs to
+    completion, possibly while another worker retries the same job: it must be idempotent.
+    """
+    def register(func):
+        JOB_HANDLERS[name] = (func, parametreler or NoJobParameters, cpu)
+        return func
+    return register
+
+def validate_job_parameters(tur: str, parametreler: dict) -> dict:
+    """Raises ValueError for unknown job types and invalid parameters"""
+    if tur not in JOB_HANDLERS:
+        raise ValueError(f"Bilinmeyen iş türü: {tur}")
+    _, model, _ = JOB_HANDLERS[tur]
+    return model(**parametreler).dict()
+
+def upload_path(dosya_adi: str) -> Path:
+    """Path of an uploaded file; refuses names that resolve outside UPLOAD_DIR"""
+    path = (UPLOAD_DIR / dosya_adi).resolve()
+    if path.parent != UPLOAD_DIR.resolve():
+        raise ValueError(f"Geçersiz dosya adı: {dosya_adi}")
+    return path
+
+async def enqueue_job(tur: str, parametreler: Optional[dict] = None, oncelik: int = 0,
+                      tekil_anahtar: Optional[str] = None, gecikme: float = 0) -> Optional[Job]:
+    """Persist a job; returns None when a job with the same tekil_anahtar already exists"""
+    job = Job(
+        tur=tur,
+        parametreler=validate_job_parameters(tur, parametreler or {}),
+        oncelik=oncelik,
+        tekil_anahtar=tekil_anahtar,
+        sonraki_deneme=datetime.utcnow() + timedelta(seconds=gecikme),
+    )
+    document = job.dict()
+    if tekil_anahtar is None:
+        # Keep the field out of the sparse unique index
+        del document["tekil_anahtar"]
+    try:
+        await db.jobs.insert_one(document)
+    except DuplicateKeyError:
+        return None
+    job_runner.wakeup()
+    return job
+
+class JobContext:
+    """Handed to async job handlers for progress reporting"""
+
+    def __init__(self, job: dict):
+        self.job = job
+
+    async def progress(self, ilerleme: float, mesaj: Optional[str] = None):
+        await db.jobs.update_one(
+            {"id": self.job["id"], "kilit_sahibi": WORKER_ID},
+            {"$set": {"ilerleme": ilerleme, "mesaj": mesaj, "guncelleme_tarihi": datetime.utcnow()}},
+        )
+
+class JobRunner:
+    """Claims jobs from the jobs collection under a lease and runs them.
+
+    A worker that dies stops renewing its leases, and once they expire another worker
+    picks the jobs up again. Failures are retried with exponential backoff until
+    max_deneme attempts have been made. Periodic jobs are enqueued by every worker
+    under the same tekil_anahtar, so only one copy runs per interval.
+    """
+
+    def __init__(self, concurrency: int, periodic: dict):
+        self.concurrency = concurrency
+        self.periodic = periodic
+        self.pool = None
+        self._scheduled = {}
+        self._running = set()
+        self._task = None
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    async def drain(self, timeout: float):
+        """Stop claiming, give running jobs `timeout` seconds and hand the rest back to the queue"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        if self._running:
+            done, pending = await asyncio.wait(self._running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self._schedule_periodic()
+                while len(self._running) < self.concurrency and not self._stopping.is_set():
+                    job = await self._claim()
+                    if job is None:
+                        break
+                    task = asyncio.create_task(self._execute(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except PyMongoError as e:
+                logger.warning(f"İş kuyruğu okunamadı: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _schedule_periodic(self):
+        now = time.time()
+        for tur, interval in self.periodic.items():
+            slot = int(now // interval)
+            if self._scheduled.get(tur) != slot:
+                await enqueue_job(tur, tekil_anahtar=f"{tur}:{slot}")
+                self._scheduled[tur] = slot
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await db.jobs.find_one_and_update(
+            {
+                "tur": {"$in": list(JOB_HANDLERS)},
+                "$or": [
+                    {"durum": "bekliyor", "sonraki_deneme": {"$lte": now}},
+                    # The worker holding this lease died
+                    {"durum": "calisiyor", "kilit_bitis": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "durum": "calisiyor",
+                    "kilit_sahibi": WORKER_ID,
+                    "kilit_bitis": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "guncelleme_tarihi": now,
+                },
+                "$inc": {"deneme": 1},
+            },
+            sort=[("oncelik", -1), ("sonraki_deneme", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _renew_lease(self, job_id: str, job_task: asyncio.Task):
+        """Keep the lease while the job runs; cancel the job once the lease may have passed to another worker"""
+        expires = time.monotonic() + JOB_LEASE_SECONDS
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                result = await db.jobs.update_one(
+                    {"id": job_id, "kilit_sahibi": WORKER_ID},
+                    {"$set": {"kilit_bitis": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                )
+            except PyMongoError as e:
+                logger.warning(f"İş kilidi yenilenemedi ({job_id}): {e}")
+                if time.monotonic() < expires:
+                    continue
+                logger.warning(f"İş kilidi süresi doldu, iş durduruluyor ({job_id})")
+                job_task.cancel()
+                return
+            if result.matched_count == 0:
+                logger.warning(f"İş kilidi başka bir işçiye geçti, iş durduruluyor ({job_id})")
+                job_task.cancel()
+                return
+            expires = time.monotonic() + JOB_LEASE_SECONDS
+
+    async def _finish(self, job: dict, update: dict):
+        update["guncelleme_tarihi"] = datetime.utcnow()
+        if update["durum"] in ("tamamlandi", "basarisiz"):
+            # Finished jobs expire through the TTL index on bitis_tarihi
+            update["bitis_tarihi"] = update["guncelleme_tarihi"]
+        await db.jobs.update_one(
+            {"id": job["id"], "kilit_sahibi": WORKER_ID},
+            {"$set": update, "$unset": {"kilit_sahibi": "", "kilit_bitis": ""}},
+        )
+
+    async def _execute(self, job: dict):
+        if job["deneme"] > job["max_deneme"]:
+            await self._finish(job, {"durum": "basarisiz", "hata": "Deneme hakkı doldu"})
+            return
+        
+        handler, _, cpu = JOB_HANDLERS[job["tur"]]
+        try:
+            parametreler = validate_job_parameters(job["tur"], job["parametreler"])
+        except ValueError as e:
+            # Retrying cannot fix bad parameters
+            await self._finish(job, {"durum": "basarisiz", "hata": str(e)})
+            return
+        
+        lease = asyncio.create_task(self._renew_lease(job["id"], asyncio.current_task()))
+        try:
+            if cpu:
+                if self.pool is None:
+                    # Forking would copy the event loop and the Motor client's threads and sockets
+                    self.pool = ProcessPoolExecutor(
+                        max_workers=JOB_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                    )
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.pool, _call_job_handler, handler, parametreler)
+            else:
+                result = await handler(JobContext(job), **parametreler)
+        except asyncio.CancelledError:
+            # Drained on shutdown or lease lost: give the job back without counting the attempt
+            # (matches nothing if another worker holds the lease by now). A cpu handler keeps
+            # running in its pool process regardless, see job_handler
+            await self._finish(job, {"durum": "bekliyor", "deneme": job["deneme"] - 1})
+            raise
+        except Exception as e:
+            logger.exception(f"İş başarısız: {job['tur']} ({job['id']})")
+            if job["deneme"] >= job["max_deneme"]:
+                await self._finish(job, {"durum": "basarisiz", "hata": str(e)})
+            else:
+                delay = min(JOB_RETRY_MAX, JOB_RETRY_BASE * 2 ** (job["deneme"] - 1))
+                await self._finish(job, {
+                    "durum": "bekliyor",
+                    "hata": str(e),
+                    "sonraki_deneme": datetime.utcnow() + timedelta(seconds=delay),
+                })
+        else:
+            await self._finish(job, {"durum": "tamamlandi", "ilerleme": 100, "sonuc": result, "hata": None})
+        finally:
+            lease.cancel()
+
+def _call_job_handler(handler, parametreler: dict):
+    return handler(**parametreler)
+
+# Job handlers
+class NoJobParameters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+class VideoSummaryParameters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    dosya_adi: str = Field(pattern=r"^[\w-][\w.-]*$")  # A file name in UPLOAD_DIR, no path
+
+class MovieFilesParameters(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    movie_id: str = Field(pattern=r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+@job_handler("video_ozeti", VideoSummaryParameters, cpu=True)
+def summarize_video(dosya_adi: str) -> dict:
+    """Size and SHA-256 of an uploaded video, to check it against the source later"""
+    path = upload_path(dosya_adi)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {"dosya_adi": dosya_adi, "boyut": path.stat().st_size, "sha256": digest.hexdigest()}
+
+@job_handler("film_dosyalari_temizle", MovieFilesParameters)
+async def remove_movie_files(context: JobContext, movie_id: str) -> dict:
+    """Delete the uploads of a deleted movie"""
+    files = list(UPLOAD_DIR.glob(f"{movie_id}_*"))
+    for index, path in enumerate(files, 1):
+        path.unlink(missing_ok=True)
+        await context.progress(100 * index / len(files), path.name)
+    return {"silinen_dosyalar": [path.name for path in files]}
+
+@job_handler("dosya_mutabakati")
+async def reconcile_uploads(context: JobContext) -> dict:
+    """Delete uploads whose movie no longer exists (e.g. a clean-up job that never ran)"""
+    files = [path for path in UPLOAD_DIR.iterdir() if path.is_file() and "_" in path.name]
+    movie_ids = {path.name.rsplit("_", 1)[0] for path in files}
+    existing = set(await db.movies.distinct("id", {"id": {"$in": list(movie_ids)}}))
+    orphans = [path for path in files if path.name.rsplit("_", 1)[0] not in existing]
+    for index, path in enumerate(orphans, 1):
+        path.unlink(missing_ok=True)
+        await context.progress(100 * index / len(orphans), path.name)
+    return {"incelenen": len(files), "silinen_dosyalar": [path.name for path in orphans]}
+
+# Job name -> interval in seconds
+PERIODIC_JOBS = {
+    "dosya_mutabakati": 24 * 60 * 60,
+}
+
+job_runner = JobRunner(JOB_CONCURRENCY, PERIODIC_JOBS)
+
+# Online migration: backfill turler / oyuncu_listesi on movies created before they existed
+NORMALIZE_MIGRATION = "normalize_tur_oyuncular"
+migrations_done = set()
+
+def normalized_filter(field: str, terms: List[str], legacy_field: str, text: str) -> dict:
+    """Exact multikey match on a normalized field, plus the old regex for documents not yet migrated"""
+    query = {field: {"$all": terms}}
+    if NORMALIZE_MIGRATION in migrations_done:
+        return query
+    return {"$or": [
+        query,
+        {field: {"$exists": False}, legacy_field: {"$regex": re.escape(text), "$options": "i"}},
+    ]}
+
+async def acquire_migration_lease(name: str) -> bool:
+    """Take or renew the lease that lets only one worker run a migration at a time"""
+    now = datetime.utcnow()
+    try:
+        await db.migrations.update_one(
+            {
+                "_id": name,
+                "tamamlandi": {"$ne": True},
+                "$or": [
+                    {"kilit_sahibi": WORKER_ID},
+                    {"kilit_bitis": {"$lt": now}},
+                    {"kilit_bitis": {"$exists": False}},
+                ],
+            },
+            {"$set": {"kilit_sahibi": WORKER_ID, "kilit_bitis": now + timedelta(seconds=MIGRATION_LEASE_SECONDS)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The document exists but is finished or leased by another worker
+        return False
+    return True
+
+async def migrate_normalized_fields():
+    """Run the backfill on whichever worker holds the lease; the others wait until it is done"""
+    while True:
+        try:
+            if await run_normalize_migration():
+                return
+        except PyMongoError as e:
+            logger.warning(f"Tür/oyuncu normalizasyon göçü kesildi, tekrar denenecek: {e}")
+        await asyncio.sleep(MIGRATION_LEASE_SECONDS / 2)
+
+async def run_normalize_migration() -> bool:
+    """Resumable, batched backfill that sleeps between batches to stay out of the way of live traffic.
+
+    Progress (the last processed _id) is stored in the migrations collection, so the next
+    lease holder continues where the previous one stopped. Returns True once the migration
+    is complete, False when another worker holds the lease.
+    """
+    state = await db.migrations.find_one({"_id": NORMALIZE_MIGRATION}) or {}
+    if state.get("tamamlandi"):
+        migrations_done.add(NORMALIZE_MIGRATION)
+        return True
+    if not await acquire_migration_lease(NORMALIZE_MIGRATION):
+        return False
+    
+    state = await db.migrations.find_one({"_id": NORMALIZE_MIGRATION})
+    last_id = state.get("son_id")
+    migrated = 0
+    while True:
+        query = {"turler": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await db.movies.find(query, {"tur": 1, "oyuncular": 1}).sort("_id", 1).limit(MIGRATION_BATCH_SIZE).to_list(MIGRATION_BATCH_SIZE)
+        if not batch:
+            break
+        
+        started = asyncio.get_running_loop().time()
+        # Stamped like any other write, so delta-sync clients receive the new fields
+        async with movie_write(len(batch)) as first:
+            # Match on the source fields so a concurrent admin edit is never overwritten with stale values
+            await db.movies.bulk_write([
+                UpdateOne(
+                    {"_id": movie["_id"], "tur": movie.get("tur"), "oyuncular": movie.get("oyuncular")},
+                    {"$set": {
+                        **normalized_movie_fields(movie.get("tur"), movie.get("oyuncular")),
+                        **movie_change_stamp(first + index),
+                    }},
+                )
+                for index, movie in enumerate(batch)
+            ], ordered=False)
+        last_id = batch[-1]["_id"]
+        migrated += len(batch)
+        await db.migrations.update_one(
+            {"_id": NORMALIZE_MIGRATION, "kilit_sahibi": WORKER_ID},
+            {"$set": {"son_id": last_id}},
+        )
+        movie_cache.clear()
+        
+        # Back off at least as long as the batch took, so the migration uses at most half the time
+        elapsed = asyncio.get_running_loop().time() - started
+        await asyncio.sleep(max(MIGRATION_BATCH_DELAY, elapsed))
+        if not await acquire_migration_lease(NORMALIZE_MIGRATION):
+            return False
+    
+    await db.migrations.update_one(
+        {"_id": NORMALIZE_MIGRATION, "kilit_sahibi": WORKER_ID},
+        {"$set": {"tamamlandi": True, "bitis_tarihi": datetime.utcnow()}, "$unset": {"kilit_sahibi": "", "kilit_bitis": ""}},
+    )
+    migrations_done.add(NORMALIZE_MIGRATION)
+    logger.info(f"Tür/oyuncu normalizasyon göçü tamamlandı ({migrated} film)")
+    return True
+
 # Auth routes
 @api_router.post("/admin/giris", response_model=Token)
 async def admin_login(login_data: AdminLogin):
@@ -244,30 +1369,136 @@ async def login_user(login_data: UserLogin):
 
 # Movie routes
 @api_router.get("/filmler", response_model=List[Movie])
-async def get_movies(ozel_sadece: bool = False, tur: Optional[str] = None, limit: int = 50):
+async def get_movies(ozel_sadece: bool = False, tur: Optional[str] = None, oyuncu: Optional[str] = None, limit: int = 50):
     query = {}
     if ozel_sadece:
         query["ozel"] = True
+    # Each filter may be an $or while the migration runs, so they are combined with $and
+    conditions = []
     if tur:
-        query["tur"] = {"$regex": tur, "$options": "i"}
+        conditions.append(normalized_filter("turler", split_terms(tur), "tur", tur))
+    if oyuncu:
+        conditions.append(normalized_filter("oyuncu_listesi", split_terms(oyuncu), "oyuncular", oyuncu))
+    if conditions:
+        query["$and"] = conditions
     
     movies = await db.movies.find(query).limit(limit).to_list(limit)
     return [Movie(**movie) for movie in movies]
 
+async def full_movie_sync(watermark: int, after: Optional[ObjectId], limit: int) -> MovieChanges:
+    """One page of the whole catalog in _id order; older documents may predate sequence numbers"""
+    query = {"_id": {"$gt": after}} if after is not None else {}
+    movies = await db.movies.find(query).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+    devami_var = len(movies) > limit
+    if devami_var:
+        movies = movies[:limit]
+    return MovieChanges(
+        sira=watermark,
+        filmler=[Movie(**movie) for movie in movies],
+        silinenler=[],
+        devami_var=devami_var,
+        tam=True,
+        imlec=f"{watermark}:{movies[-1]['_id']}" if devami_var else None,
+    )
+
+@api_router.get("/filmler/degisiklikler", response_model=MovieChanges)
+async def get_movie_changes(since: int = 0, limit: int = Query(500, ge=1, le=1000), imlec: Optional[str] = None):
+    if imlec:
+        # Next page of a full sync, which keeps the watermark of its first page
+        watermark, _, after = imlec.partition(":")
+        try:
+            return await full_movie_sync(int(watermark), ObjectId(after), limit)
+        except (ValueError, InvalidId):
+            raise HTTPException(status_code=400, detail="Geçersiz imleç")
+    
+    # Read the watermark first: anything written after it is picked up by the next call
+    watermark = await safe_sequence("movies")
+    if since <= 0 or since > watermark:
+        # A client ahead of the server is holding a copy of a different database
+        return await full_movie_sync(watermark, None, limit)
+    
+    movies = await db.movies.find(
+        {"sira": {"$gt": since, "$lte": watermark}}
+    ).sort("sira", 1).limit(limit + 1).to_list(limit + 1)
+    devami_var = len(movies) > limit
+    if devami_var:
+        movies = movies[:limit]
+        watermark = movies[-1]["sira"]
+    tombstones = await db.movie_tombstones.find(
+        {"sira": {"$gt": since, "$lte": watermark}}, {"id": 1}
+    ).to_list(None)
+    return MovieChanges(
+        sira=watermark,
+        filmler=[Movie(**movie) for movie in movies],
+        silinenler=[tombstone["id"] for tombstone in tombstones],
+        devami_var=devami_var,
+    )
+
+async def lookup_movies(ids: List[str], fields: Optional[List[str]] = None) -> MovieBatch:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BATCH_LOOKUP_LIMIT:
+        raise HTTPException(status_code=400, detail=f"En fazla {BATCH_LOOKUP_LIMIT} film istenebilir")
+    if fields:
+        unknown = [field for field in fields if field not in Movie.__fields__]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Bilinmeyen alanlar: {', '.join(unknown)}")
+        fields = {"id", *fields}
+    
+    found = {}
+    missing = []
+    generation = movie_cache.generation
+    for movie_id in ids:
+        cached = movie_cache.get(movie_id)
+        if cached is not None:
+            found[movie_id] = cached
+        else:
+            missing.append(movie_id)
+    if missing:
+        async for movie in db.movies.find({"id": {"$in": missing}}):
+            movie = Movie(**movie)
+            movie_cache.set(movie.id, movie, generation)
+            found[movie.id] = movie
+    
+    return MovieBatch(
+        filmler=[found[movie_id].dict(include=fields or None) for movie_id in ids if movie_id in found],
+        bulunamayanlar=[movie_id for movie_id in ids if movie_id not in found],
+    )
+
+@api_router.get("/filmler/toplu", response_model=MovieBatch)
+async def get_movies_batch(idler: str, alanlar: Optional[str] = None):
+    ids = [movie_id.strip() for movie_id in idler.split(",") if movie_id.strip()]
+    fields = [field.strip() for field in alanlar.split(",") if field.strip()] if alanlar else None
+    return await lookup_movies(ids, fields)
+
+@api_router.post("/filmler/toplu", response_model=MovieBatch)
+async def post_movies_batch(batch: MovieBatchRequest):
+    return await lookup_movies(batch.idler, batch.alanlar)
+
 @api_router.get("/filmler/{movie_id}", response_model=Movie)
 async def get_movie(movie_id: str):
+    cached = movie_cache.get(movie_id)
+    if cached is not None:
+        return cached
+    generation = movie_cache.generation
     movie = await db.movies.find_one({"id": movie_id})
     if not movie:
         raise HTTPException(status_code=404, detail="Film bulunamadı")
-    return Movie(**movie)
+    movie = Movie(**movie)
+    movie_cache.set(movie_id, movie, generation)
+    return movie
 
 @api_router.post("/admin/filmler", response_model=Movie)
 async def create_movie(movie_data: MovieCreate, token_data: dict = Depends(verify_token)):
     if token_data.get("rol") != "admin":
         raise HTTPException(status_code=403, detail="Admin erişimi gerekli")
     
-    movie = Movie(**movie_data.dict())
-    await db.movies.insert_one(movie.dict())
+    async with movie_write() as sira:
+        movie = Movie(
+            **movie_data.dict(),
+            **normalized_movie_fields(movie_data.tur, movie_data.oyuncular),
+            **movie_change_stamp(sira),
+        )
+        await db.movies.insert_one(movie.dict())
     return movie
 
 @api_router.put("/admin/filmler/{movie_id}", response_model=Movie)
@@ -281,7 +1512,14 @@ async def update_movie(movie_id: str, movie_data: MovieUpdate, token_data: dict
     
     update_data = {k: v for k, v in movie_data.dict().items() if v is not None}
     if update_data:
-        await db.movies.update_one({"id": movie_id}, {"$set": update_data})
+        update_data.update(normalized_movie_fields(
+            update_data.get("tur", movie.get("tur")),
+            update_data.get("oyuncular", movie.get("oyuncular")),
+        ))
+        async with movie_write() as sira:
+            update_data.update(movie_change_stamp(sira))
+            await db.movies.update_one({"id": movie_id}, {"$set": update_data})
+        movie_cache.invalidate(movie_id)
     
     updated_movie = await db.movies.find_one({"id": movie_id})
     return Movie(**updated_movie)
@@ -291,9 +1529,17 @@ async def delete_movie(movie_id: str, token_data: dict = Depends(verify_token)):
     if token_data.get("rol") != "admin":
         raise HTTPException(status_code=403, detail="Admin erişimi gerekli")
     
-    result = await db.movies.delete_one({"id": movie_id})
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Film bulunamadı")
+    async with movie_write() as sira:
+        result = await db.movies.delete_one({"id": movie_id})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Film bulunamadı")
+        await db.movie_tombstones.update_one(
+            {"id": movie_id},
+            {"$set": {"id": movie_id, "silinme_tarihi": datetime.utcnow(), "sira": sira}},
+            upsert=True,
+        )
+    movie_cache.invalidate(movie_id)
+    await enqueue_job("film_dosyalari_temizle", {"movie_id": movie_id}, oncelik=1)
     return {"mesaj": "Film başarıyla silindi"}
 
 @api_router.post("/admin/filmler/{movie_id}/video-yukle")
@@ -312,7 +1558,14 @@ async def upload_video(movie_id: str, video: UploadFile = File(...), token_data:
     with open(video_path, "wb") as buffer:
         shutil.copyfileobj(video.file, buffer)
     
-    await db.movies.update_one({"id": movie_id}, {"$set": {"video_file": video_filename}})
+    async with movie_write() as sira:
+        await db.movies.update_one({"id": movie_id}, {"$set": {"video_file": video_filename, **movie_change_stamp(sira)}})
+    movie_cache.invalidate(movie_id)
+    try:
+        await enqueue_job("video_ozeti", {"dosya_adi": video_filename}, oncelik=5)
+    except ValueError as e:
+        # The upload itself succeeded; only the follow-up summary is skipped
+        logger.warning(f"Video özeti kuyruğa alınamadı: {e}")
     
     return {"mesaj": "Video başarıyla yüklendi", "dosya_adi": video_filename}
 
@@ -332,7 +1585,9 @@ async def upload_cover(movie_id: str, kapak: UploadFile = File(...), token_data:
     with open(cover_path, "wb") as buffer:
         shutil.copyfileobj(kapak.file, buffer)
     
-    await db.movies.update_one({"id": movie_id}, {"$set": {"kapak_resmi": cover_filename}})
+    async with movie_write() as sira:
+        await db.movies.update_one({"id": movie_id}, {"$set": {"kapak_resmi": cover_filename, **movie_change_stamp(sira)}})
+    movie_cache.invalidate(movie_id)
     
     return {"mesaj": "Kapak resmi başarıyla yüklendi", "dosya_adi": cover_filename}
 
@@ -352,7 +1607,9 @@ async def upload_background(movie_id: str, arkaplan: UploadFile = File(...), tok
     with open(bg_path, "wb") as buffer:
         shutil.copyfileobj(arkaplan.file, buffer)
     
-    await db.movies.update_one({"id": movie_id}, {"$set": {"arkaplan_resmi": bg_filename}})
+    async with movie_write() as sira:
+        await db.movies.update_one({"id": movie_id}, {"$set": {"arkaplan_resmi": bg_filename, **movie_change_stamp(sira)}})
+    movie_cache.invalidate(movie_id)
     
     return {"mesaj": "Arkaplan resmi başarıyla yüklendi", "dosya_adi": bg_filename}
 
@@ -372,12 +1629,19 @@ async def get_youtube_embed_url(video_id: str):
 # Site settings routes
 @api_router.get("/ayarlar", response_model=SiteSettings)
 async def get_settings():
+    cached = settings_cache.get("site")
+    if cached is not None:
+        return cached
+    generation = settings_cache.generation
     settings = await db.settings.find_one()
     if not settings:
         default_settings = SiteSettings()
         await db.settings.insert_one(default_settings.dict())
+        await bump_version("settings")
         return default_settings
-    return SiteSettings(**settings)
+    settings = SiteSettings(**settings)
+    settings_cache.set("site", settings, generation)
+    return settings
 
 @api_router.put("/admin/ayarlar", response_model=SiteSettings)
 async def update_settings(settings_data: SiteSettings, token_data: dict = Depends(verify_token)):
@@ -387,6 +1651,8 @@ async def update_settings(settings_data: SiteSettings, token_data: dict = Depend
     settings_data.guncelleme_tarihi = datetime.utcnow()
     await db.settings.delete_many({})
     await db.settings.insert_one(settings_data.dict())
+    settings_cache.clear()
+    await bump_version("settings")
     return settings_data
 
 # Search route
@@ -425,12 +1691,69 @@ async def get_recent_movies(limit: int = 10):
     movies = await db.movies.find().sort("olusturulma_tarihi", -1).limit(limit).to_list(limit)
     return [Movie(**movie) for movie in movies]
 
+# Background job routes
+@api_router.get("/admin/isler", response_model=List[Job])
+async def get_jobs(durum: Optional[str] = None, limit: int = 50, token_data: dict = Depends(verify_token)):
+    if token_data.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="Admin erişimi gerekli")
+    
+    query = {"durum": durum} if durum else {}
+    jobs = await db.jobs.find(query).sort("olusturulma_tarihi", -1).limit(limit).to_list(limit)
+    return [Job(**job) for job in jobs]
+
+@api_router.get("/admin/isler/{job_id}", response_model=Job)
+async def get_job(job_id: str, token_data: dict = Depends(verify_token)):
+    if token_data.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="Admin erişimi gerekli")
+    
+    job = await db.jobs.find_one({"id": job_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="İş bulunamadı")
+    return Job(**job)
+
+@api_router.post("/admin/isler", response_model=Job)
+async def create_job(job_data: JobCreate, token_data: dict = Depends(verify_token)):
+    if token_data.get("rol") != "admin":
+        raise HTTPException(status_code=403, detail="Admin erişimi gerekli")
+    
+    try:
+        return await enqueue_job(job_data.tur, job_data.parametreler, job_data.oncelik)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Health check routes
+@app.get("/saglik/canli")
+async def liveness():
+    return {"durum": "canli"}
+
+@app.get("/saglik/hazir")
+async def readiness():
+    if not getattr(app.state, "hazir", False):
+        return JSONResponse(status_code=503, content={"durum": "hazirlaniyor"})
+    return {"durum": "hazir"}
+
 # Include the router in the main app
 app.include_router(api_router)
 
 # Mount static files
 app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
+# Middleware added first runs innermost: cache -> gzip -> rate limit -> CORS
+app.add_middleware(
+    CatalogResponseCacheMiddleware,
+    caches=CACHEABLE_PATHS,
+)
+
+app.add_middleware(ApiGZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+
+# Added before CORS so that 429/503 responses still carry CORS headers
+app.add_middleware(
+    RateLimitMiddleware,
+    backend=rate_limit_backend,
+    limits=RATE_LIMITS,
+    concurrency=CONCURRENCY_LIMITS,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -446,6 +1769,125 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Indexes the queries above rely on: (collection, keys, options)
+INDEXES = [
+    ("movies", [("id", 1)], {"unique": True}),
+    ("movies", [("sira", 1)], {}),
+    ("movies", [("turler", 1)], {}),
+    ("movies", [("oyuncu_listesi", 1)], {}),
+    ("movie_tombstones", [("sira", 1)], {}),
+    ("movie_tombstones", [("id", 1)], {"unique": True}),
+    ("jobs", [("id", 1)], {"unique": True}),
+    ("jobs", [("durum", 1), ("oncelik", -1), ("sonraki_deneme", 1)], {}),
+    ("jobs", [("tekil_anahtar", 1)], {"unique": True, "sparse": True}),
+    ("jobs", [("bitis_tarihi", 1)], {"expireAfterSeconds": JOB_RETENTION_SECONDS}),
+]
+if RATE_LIMIT_BACKEND == "mongo":
+    # Idle buckets are full again after a few minutes, let Mongo drop them
+    INDEXES.append(("rate_limits", [("son_erisim", 1)], {"expireAfterSeconds": 600}))
+
+async def ensure_indexes():
+    for collection, keys, options in INDEXES:
+        await db[collection].create_index(keys, **options)
+    for collection, keys, _ in INDEXES:
+        existing = [index["key"] for index in (await db[collection].index_information()).values()]
+        if keys not in existing:
+            raise RuntimeError(f"{collection} koleksiyonunda indeks eksik: {keys}")
+
+async def warm_connection_pool():
+    await client.admin.command("ping")
+    # Concurrent commands make the driver open that many connections up front
+    await asyncio.gather(*[client.admin.command("ping") for _ in range(MONGO_MIN_POOL_SIZE)])
+
+# Requests the homepage makes on every visit, served from the response cache once warmed
+WARMUP_REQUESTS = [
+    ("/api/filmler", b""),
+    ("/api/filmler", b"ozel_sadece=true"),
+    ("/api/populer-filmler", b""),
+    ("/api/yeni-filmler", b""),
+    ("/api/turler", b""),
+]
+
+async def warm_request(path: str, query_string: bytes, accept_encoding: bytes) -> int:
+    """Run a GET through the full middleware stack, so its caches are filled the same way real traffic fills them"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", accept_encoding)],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+        "app": app,
+    }
+    status_code = 500
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+    
+    await app(scope, receive, send)
+    return status_code
+
+async def warm_up():
+    """Open the pool and preload the caches the homepage reads"""
+    await warm_connection_pool()
+    await get_settings()
+    for path, query_string in WARMUP_REQUESTS:
+        for accept_encoding in (b"gzip", b"identity"):
+            status_code = await warm_request(path, query_string, accept_encoding)
+            if status_code != 200:
+                raise RuntimeError(f"{path} ısınma isteği {status_code} döndü")
+
+async def retry_until_done(step, description: str, attempts: Optional[int] = None) -> bool:
+    """Run step until it succeeds, or give up after `attempts` failures; returns whether it succeeded"""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            await step()
+            return True
+        except Exception as e:
+            if attempts is not None and attempt >= attempts:
+                logger.error(f"{description} {attempt} denemede başarısız oldu, vazgeçiliyor: {e}")
+                return False
+            logger.warning(f"{description} başarısız, tekrar denenecek: {e}")
+            await asyncio.sleep(WARMUP_RETRY_DELAY)
+
+async def prepare():
+    """Create indexes, start the background work that relies on them, warm up, then mark the worker ready"""
+    started = time.monotonic()
+    # Periodic job de-duplication depends on the unique tekil_anahtar index
+    await retry_until_done(ensure_indexes, "İndeks kontrolü")
+    app.state.migration_task = asyncio.create_task(migrate_normalized_fields())
+    job_runner.start()
+    if STARTUP_WARMUP:
+        # Only the indexes are worth blocking readiness on; cold caches fill on first use
+        await retry_until_done(warm_up, "Isınma", WARMUP_ATTEMPTS)
+    app.state.hazir = True
+    logger.info(f"Sunucu hazır ({time.monotonic() - started:.2f} sn)")
+
+async def startup():
+    app.state.hazir = False
+    app.state.migration_task = None
+    app.state.prepare_task = asyncio.create_task(prepare())
+    cache_coherence.start()
+
+async def shutdown():
+    # Let the load balancer stop routing here while we drain
+    app.state.hazir = False
+    app.state.prepare_task.cancel()
+    await job_runner.drain(JOB_DRAIN_TIMEOUT)
+    if app.state.migration_task is not None:
+        app.state.migration_task.cancel()
+    await cache_coherence.stop()
+    client.close()
@@ -10,6 +10,7 @@ class UltraCinemaAPITester:
         self.tests_run = 0
         self.tests_passed = 0
         self.created_movie_id = None
+        self.catalog_seq = 0
 
     def run_test(self, name, method, endpoint, expected_status, data=None, headers=None):
         """Run a single API test"""
@@ -58,6 +59,12 @@ class UltraCinemaAPITester:
             print(f"❌ Failed - Error: {str(e)}")
             return False, {}
 
+    def test_health_checks(self):
+        """Test liveness and readiness endpoints"""
+        live, _ = self.run_test("Liveness Check", "GET", "/saglik/canli", 200)
+        ready, _ = self.run_test("Readiness Check", "GET", "/saglik/hazir", 200)
+        return live and ready
+
     def test_admin_login(self):
         """Test admin login with correct password"""
         success, response = self.run_test(
@@ -181,6 +188,23 @@ class UltraCinemaAPITester:
         
         return success
 
+    def test_movie_list_compression_cache(self):
+        """Test catalog lists negotiate gzip and repeat requests hit the response cache"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing Movie List Compression and Cache...")
+        url = f"{self.base_url}/api/filmler"
+        first = requests.get(url, headers={'Accept-Encoding': 'gzip'})
+        second = requests.get(url, headers={'Accept-Encoding': 'gzip'})
+        if 'Accept-Encoding' not in second.headers.get('Vary', ''):
+            print(f"❌ Failed - Vary: Accept-Encoding missing")
+            return False
+        if second.headers.get('X-Cache') != 'HIT' or second.json() != first.json():
+            print(f"❌ Failed - Repeat request not served from cache (X-Cache: {second.headers.get('X-Cache')})")
+            return False
+        self.tests_passed += 1
+        print(f"✅ Passed - Content-Encoding: {second.headers.get('Content-Encoding', 'identity')}, X-Cache: HIT")
+        return True
+
     def test_get_featured_movies(self):
         """Test getting only featured movies"""
         success, response = self.run_test(
@@ -215,6 +239,28 @@ class UltraCinemaAPITester:
         
         return success
 
+    def test_get_movies_batch(self):
+        """Test batch lookup keeps the requested order and reports missing ids"""
+        if not self.created_movie_id:
+            print("⚠️  Skipping batch lookup test - no movie ID available")
+            return True
+
+        success, response = self.run_test(
+            "Batch Movie Lookup",
+            "POST",
+            "/api/filmler/toplu",
+            200,
+            data={"idler": ["olmayan-film", self.created_movie_id], "alanlar": ["baslik"]}
+        )
+        if success and isinstance(response, dict):
+            filmler = response.get('filmler', [])
+            if [movie['id'] for movie in filmler] == [self.created_movie_id] and response.get('bulunamayanlar') == ["olmayan-film"]:
+                print(f"   ✅ Batch lookup returned found and missing ids")
+            else:
+                print(f"   ❌ Unexpected batch lookup response")
+                return False
+        return success
+
     def test_search_movies(self):
         """Test movie search functionality"""
         success, response = self.run_test(
@@ -270,6 +316,101 @@ class UltraCinemaAPITester:
         
         return success
 
+    def test_filter_movies_genre_normalized(self):
+        """Test genre filter matches regardless of case and Turkish characters"""
+        success, response = self.run_test(
+            "Filter Movies (BİLİM KURGU)",
+            "GET",
+            "/api/filmler?tur=B%C4%B0L%C4%B0M%20KURGU",
+            200
+        )
+        if success and isinstance(response, list):
+            if any(movie['id'] == self.created_movie_id for movie in response):
+                print(f"   ✅ Genre filter matched normalized genre")
+            else:
+                print(f"   ⚠️ Created movie not found by normalized genre")
+        return success
+
+    def test_movie_changes_full_sync(self):
+        """Test delta sync endpoint without a sequence number returns the whole catalog"""
+        success, response = self.run_test(
+            "Movie Changes (Full Sync)",
+            "GET",
+            "/api/filmler/degisiklikler",
+            200
+        )
+        if success and isinstance(response, dict):
+            self.catalog_seq = response.get('sira', 0)
+            ids = [movie['id'] for movie in response.get('filmler', [])]
+            if self.created_movie_id in ids:
+                print(f"   ✅ Created movie found in full sync (sira={self.catalog_seq})")
+            else:
+                print(f"   ⚠️ Created movie missing in full sync")
+        return success
+
+    def test_movie_changes_full_sync_paginated(self):
+        """Test full sync pages follow the cursor and keep the first page's watermark"""
+        success, response = self.run_test(
+            "Movie Changes (Full Sync, 1 per page)",
+            "GET",
+            "/api/filmler/degisiklikler?limit=1",
+            200
+        )
+        ids = []
+        pages = 0
+        while success and isinstance(response, dict) and pages < 100:
+            pages += 1
+            ids.extend(movie['id'] for movie in response.get('filmler', []))
+            if not response.get('devami_var'):
+                break
+            success, response = self.run_test(
+                f"Movie Changes (Full Sync, page {pages + 1})",
+                "GET",
+                f"/api/filmler/degisiklikler?limit=1&imlec={response['imlec']}",
+                200
+            )
+        if success and self.created_movie_id and self.created_movie_id not in ids:
+            print(f"   ❌ Created movie missing across {pages} pages")
+            return False
+        return success
+
+    def test_movie_changes_after_delete(self):
+        """Test delta sync reports deleted movies as tombstones"""
+        if not self.created_movie_id:
+            print("⚠️  Skipping movie changes test - no movie ID available")
+            return True
+
+        success, response = self.run_test(
+            "Movie Changes (After Delete)",
+            "GET",
+            f"/api/filmler/degisiklikler?since={self.catalog_seq}",
+            200
+        )
+        if success and isinstance(response, dict):
+            if self.created_movie_id in response.get('silinenler', []):
+                print(f"   ✅ Deleted movie reported in tombstones")
+            else:
+                print(f"   ❌ Deleted movie missing in tombstones")
+                return False
+        return success
+
+    def test_movie_cleanup_job(self):
+        """Test deleting a movie queues a clean-up job for its uploads"""
+        success, response = self.run_test(
+            "List Background Jobs",
+            "GET",
+            "/api/admin/isler",
+            200
+        )
+        if success and isinstance(response, list):
+            jobs = [job for job in response if job.get('tur') == 'film_dosyalari_temizle'
+                    and job.get('parametreler', {}).get('movie_id') == self.created_movie_id]
+            if jobs:
+                print(f"   ✅ Clean-up job found (durum={jobs[0]['durum']})")
+            else:
+                print(f"   ⚠️ Clean-up job not found for deleted movie")
+        return success
+
     def test_unauthorized_access(self):
         """Test accessing admin endpoints without token"""
         # Temporarily remove token
@@ -351,6 +492,27 @@ class UltraCinemaAPITester:
         )
         return success
 
+    def test_login_rate_limit(self):
+        """Test repeated failed logins from one client are throttled with Retry-After"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing Login Rate Limit...")
+        # Earlier tests already used part of this client's login bucket (5 per minute)
+        for attempt in range(1, 7):
+            response = requests.post(f"{self.base_url}/api/admin/giris", json={"sifre": "wrong_password"})
+            if response.status_code == 429:
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and int(retry_after) >= 1:
+                    self.tests_passed += 1
+                    print(f"✅ Passed - Attempt {attempt} throttled, Retry-After: {retry_after}s")
+                    return True
+                print(f"❌ Failed - 429 without a valid Retry-After header")
+                return False
+            if response.status_code != 401:
+                print(f"❌ Failed - Expected 401 or 429, got {response.status_code}")
+                return False
+        print(f"❌ Failed - Sixth failed login was not throttled")
+        return False
+
 def main():
     print("🎬 Ultra Cinema API Testing Suite")
     print("=" * 50)
@@ -359,6 +521,7 @@ def main():
     
     # Test sequence
     test_functions = [
+        tester.test_health_checks,
         tester.test_admin_login_invalid,
         tester.test_admin_login,
         tester.test_get_settings,
@@ -368,13 +531,22 @@ def main():
         tester.test_create_second_movie,
         tester.test_create_movie_with_partial_images,
         tester.test_get_movies_with_data,
+        tester.test_movie_list_compression_cache,
         tester.test_get_featured_movies,
         tester.test_get_single_movie,
+        tester.test_get_movies_batch,
         tester.test_search_movies,
         tester.test_search_movies_genre,
+        tester.test_filter_movies_genre_normalized,
+        tester.test_movie_changes_full_sync,
+        tester.test_movie_changes_full_sync_paginated,
         tester.test_update_movie,
         tester.test_update_movie_remove_images,
         tester.test_delete_movie,
+        tester.test_movie_changes_after_delete,
+        tester.test_movie_cleanup_job,
+        # Last: exhausts this client's login bucket
+        tester.test_login_rate_limit,
     ]
     
     # Run all tests
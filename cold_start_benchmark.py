@@ -0,0 +1,86 @@
+"""Cold start to first byte, with and without the startup warm-up.
+
+Needs the MongoDB from backend/.env with a realistic catalog loaded:
+    python cold_start_benchmark.py
+"""
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+PORT = int(os.environ.get("BENCHMARK_PORT", "8765"))
+BASE_URL = f"http://127.0.0.1:{PORT}"
+
+# Requests the homepage makes on every visit
+HOMEPAGE_REQUESTS = [
+    "/api/ayarlar",
+    "/api/filmler",
+    "/api/filmler?ozel_sadece=true",
+    "/api/populer-filmler",
+    "/api/yeni-filmler",
+    "/api/turler",
+]
+
+
+def wait_for(path, timeout=60):
+    """Poll until the endpoint answers 200, return seconds waited"""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        try:
+            if requests.get(f"{BASE_URL}{path}", timeout=1).status_code == 200:
+                return time.monotonic() - started
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{path} did not become available in {timeout}s")
+
+
+def time_to_first_byte(path):
+    """Seconds until the response headers of a first request arrive"""
+    response = requests.get(f"{BASE_URL}{path}", headers={"Accept-Encoding": "gzip"}, stream=True)
+    response.close()
+    return response.elapsed.total_seconds()
+
+
+def measure(warmup):
+    """Start a fresh uvicorn worker and time the first homepage load"""
+    env = dict(os.environ, STARTUP_WARMUP="true" if warmup else "false")
+    started = time.monotonic()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        wait_for("/saglik/canli")
+        # A load balancer only sends traffic once the worker reports ready
+        wait_for("/saglik/hazir")
+        ready = time.monotonic() - started
+        latencies = {path: time_to_first_byte(path) for path in HOMEPAGE_REQUESTS}
+        return ready, latencies
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    print("🎬 Ultra Cinema Cold Start Benchmark")
+    print("=" * 50)
+
+    for name, warmup in (("Before (no warm-up)", False), ("After (warm-up)", True)):
+        ready, latencies = measure(warmup)
+        print(f"\n{name}")
+        print(f"   Ready after: {ready * 1000:.0f} ms")
+        for path, latency in latencies.items():
+            print(f"   {path}: {latency * 1000:.1f} ms to first byte")
+        print(f"   Homepage total: {sum(latencies.values()) * 1000:.1f} ms")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { BrowserRouter as Router, Routes, Route, Navigate, useNavigate, useLocation } from 'react-router-dom';
 import axios from 'axios';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './components/ui/card';
@@ -45,6 +45,20 @@ import './App.css';
 
 const API_BASE = process.env.REACT_APP_BACKEND_URL;
 
+// Applies a delta-sync response to a list of movies; safe to apply the same changes twice
+const mergeMovieChanges = (current, filmler, silinenler) => {
+  const changed = new Map(filmler.map((movie) => [movie.id, movie]));
+  const deleted = new Set(silinenler);
+  const merged = current
+    .filter((movie) => !deleted.has(movie.id))
+    .map((movie) => {
+      const updated = changed.get(movie.id);
+      changed.delete(movie.id);
+      return updated || movie;
+    });
+  return [...merged, ...changed.values()];
+};
+
 // API functions
 const api = {
   get: (url) => axios.get(`${API_BASE}${url}`),
@@ -972,16 +986,34 @@ function AdminDashboard() {
     yaş_siniri: 'Genel İzleyici'
   });
   const { logout } = React.useContext(AuthContext);
+  const catalogSeq = useRef(0);
 
   useEffect(() => {
     fetchMovies();
     fetchSettings();
   }, []);
 
+  // Only pulls the movies changed since the last call; the first call loads the whole catalog
   const fetchMovies = async () => {
     try {
-      const response = await api.get('/api/filmler');
-      setMovies(response.data);
+      let cursor = null;
+      let hasMore = true;
+      while (hasMore) {
+        const query = cursor ? `imlec=${encodeURIComponent(cursor)}` : `since=${catalogSeq.current}`;
+        const response = await api.get(`/api/filmler/degisiklikler?${query}`);
+        const { sira, filmler, silinenler, devami_var, tam, imlec } = response.data;
+        if (tam && !cursor) {
+          setMovies(filmler);
+        } else {
+          setMovies((current) => mergeMovieChanges(current, filmler, silinenler));
+        }
+        // A full sync only counts once its last page has arrived
+        if (!tam || !devami_var) {
+          catalogSeq.current = sira;
+        }
+        cursor = imlec;
+        hasMore = devami_var;
+      }
     } catch (error) {
       console.error('Filmler yüklenirken hata:', error);
     }
@@ -0,0 +1,92 @@
+"""Batch movie lookup (/api/filmler/toplu) against an in-memory movies collection."""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+
+
+def movie(movie_id):
+    return {"id": movie_id, "baslik": movie_id.upper(), "aciklama": "", "tur": "Dram", "yil": 2020, "puan": 7}
+
+
+class FakeMovies:
+    """find over a fixed list of movies, recording the ids each query asked for"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.queried = []
+
+    async def find(self, query):
+        ids = query["id"]["$in"]
+        self.queried.append(ids)
+        for doc in self.documents:
+            if doc["id"] in ids:
+                yield dict(doc)
+
+
+class FakeDatabase:
+    def __init__(self):
+        # Stored in a different order from the requests below
+        self.movies = FakeMovies([movie("c"), movie("a"), movie("b")])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, "db", db)
+    server.movie_cache.clear()
+    server.rate_limit_backend._buckets.clear()
+    return db
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(server.app)
+
+
+def test_movies_come_back_in_requested_order(client):
+    response = client.get("/api/filmler/toplu", params={"idler": "b,yok,a,c"})
+
+    assert response.status_code == 200
+    assert [m["id"] for m in response.json()["filmler"]] == ["b", "a", "c"]
+    assert response.json()["bulunamayanlar"] == ["yok"]
+
+
+def test_duplicate_ids_are_returned_once(client, db):
+    response = client.post("/api/filmler/toplu", json={"idler": ["a", "b", "a"]})
+
+    assert [m["id"] for m in response.json()["filmler"]] == ["a", "b"]
+    assert db.movies.queried == [["a", "b"]]
+
+
+def test_more_ids_than_the_limit_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(server, "BATCH_LOOKUP_LIMIT", 2)
+
+    response = client.post("/api/filmler/toplu", json={"idler": ["a", "b", "c"]})
+
+    assert response.status_code == 400
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/filmler/toplu", params={"idler": "a", "alanlar": "baslik,sifre_hash"})
+
+    assert response.status_code == 400
+    assert "sifre_hash" in response.json()["detail"]
+
+
+def test_requested_fields_only(client):
+    response = client.get("/api/filmler/toplu", params={"idler": "a", "alanlar": "baslik"})
+
+    assert response.json()["filmler"] == [{"id": "a", "baslik": "A"}]
+
+
+def test_cached_movies_are_not_queried(client, db):
+    client.get("/api/filmler/toplu", params={"idler": "a"})
+
+    client.get("/api/filmler/toplu", params={"idler": "a,b"})
+
+    assert db.movies.queried == [["a"], ["b"]]
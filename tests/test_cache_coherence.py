@@ -0,0 +1,143 @@
+"""CacheCoherence against a real MongoDB.
+
+Change stream tests need a replica set (a single node is enough):
+    mongod --replSet rs0 && mongosh --eval "rs.initiate()"
+Point TEST_MONGO_URL at it; tests are skipped when no server is reachable.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+from server import CacheCoherence, LocalCache  # noqa: E402
+
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL", "mongodb://localhost:27017/?directConnection=true")
+
+
+async def server_info():
+    client = AsyncIOMotorClient(TEST_MONGO_URL, serverSelectionTimeoutMS=500)
+    try:
+        return await client.admin.command("hello")
+    except Exception:
+        return None
+    finally:
+        client.close()
+
+
+INFO = asyncio.run(server_info())
+requires_mongo = pytest.mark.skipif(INFO is None, reason="MongoDB is not reachable")
+requires_replica_set = pytest.mark.skipif(
+    INFO is None or "setName" not in INFO, reason="change streams need a replica set"
+)
+requires_standalone = pytest.mark.skipif(
+    INFO is None or "setName" in INFO, reason="needs a standalone mongod"
+)
+
+
+def run_with_db(test):
+    """Run test(db) on a fresh event loop against a throwaway database"""
+    async def main():
+        client = AsyncIOMotorClient(TEST_MONGO_URL)
+        name = f"test_coherence_{uuid.uuid4().hex[:8]}"
+        try:
+            await test(client[name])
+        finally:
+            await client.drop_database(name)
+            client.close()
+    asyncio.run(main())
+
+
+async def eventually(predicate, timeout=10):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.05)
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(server, "CACHE_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(server, "CACHE_RETRY_DELAY", 0.05)
+
+
+@requires_replica_set
+def test_stream_invalidates_updated_movie_only():
+    async def test(db):
+        cache = LocalCache("movies")
+        coherence = CacheCoherence(db, {"movies": [cache]}, "stream")
+        coherence.start()
+        try:
+            await eventually(lambda: coherence.active_mode == "stream")
+            await db.movies.insert_many([{"id": "a", "baslik": "A"}, {"id": "b", "baslik": "B"}])
+            await eventually(lambda: coherence.resume_token is not None)
+            cache.set("a", "eski")
+            cache.set("b", "eski")
+
+            await db.movies.update_one({"id": "a"}, {"$set": {"baslik": "A2"}})
+
+            await eventually(lambda: cache.get("a") is None)
+            assert cache.get("b") == "eski"
+        finally:
+            await coherence.stop()
+    run_with_db(test)
+
+
+@requires_replica_set
+def test_stream_resumes_from_token_after_disconnect():
+    async def test(db):
+        cache = LocalCache("settings")
+        coherence = CacheCoherence(db, {"settings": [cache]}, "stream")
+        coherence.start()
+        await eventually(lambda: coherence.active_mode == "stream")
+        await db.settings.insert_one({"id": "site"})
+        await eventually(lambda: coherence.resume_token is not None)
+        await coherence.stop()
+
+        # Written while disconnected; only the resume token can deliver it
+        cache.set("site", "eski")
+        await db.settings.update_one({"id": "site"}, {"$set": {"site_adi": "Yeni"}})
+        coherence.start()
+        try:
+            await eventually(lambda: cache.get("site") is None)
+        finally:
+            await coherence.stop()
+    run_with_db(test)
+
+
+@requires_mongo
+def test_poll_invalidates_on_first_write():
+    async def test(db):
+        cache = LocalCache("movies")
+        coherence = CacheCoherence(db, {"movies": [cache]}, "poll")
+        coherence.start()
+        try:
+            await eventually(lambda: coherence.active_mode == "poll")
+            await asyncio.sleep(0.2)
+            cache.set("a", "eski")
+
+            # No versions document exists yet, as on a fresh deployment
+            await db.versions.update_one({"_id": "movies"}, {"$inc": {"surum": 1}}, upsert=True)
+
+            await eventually(lambda: cache.get("a") is None)
+        finally:
+            await coherence.stop()
+    run_with_db(test)
+
+
+@requires_standalone
+def test_auto_falls_back_to_polling_without_change_streams():
+    async def test(db):
+        coherence = CacheCoherence(db, {"movies": [LocalCache("movies")]}, "auto")
+        coherence.start()
+        try:
+            await eventually(lambda: coherence.active_mode == "poll")
+        finally:
+            await coherence.stop()
+    run_with_db(test)
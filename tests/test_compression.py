@@ -0,0 +1,155 @@
+"""Accept-Encoding negotiation and the compressed catalog response cache."""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+from server import (  # noqa: E402
+    CACHEABLE_PATHS,
+    COHERENCE_COLLECTIONS,
+    RESPONSE_CACHES,
+    ApiGZipMiddleware,
+    CacheCoherence,
+    CatalogResponseCacheMiddleware,
+    ResponseCache,
+    accepts_gzip,
+)
+
+LONG_TEXT = "Uzun bir film açıklaması. " * 200
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("deflate, gzip;q=0.5", True),
+    ("*", True),
+    ("*;q=0, gzip", True),
+    ("", False),
+    ("identity", False),
+    ("gzip;q=0", False),
+    ("gzip;level=1;q=0", False),
+    ("GZIP ; Q=0.0", False),
+    ("gzip;q=0, *", False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+@pytest.fixture
+def catalog():
+    """A stand-in catalog app wrapped like server.app: cache inside gzip"""
+    app = FastAPI()
+    cache = ResponseCache("test", max_items=16)
+    calls = []
+    during_render = []
+
+    @app.get("/api/filmler")
+    async def movies():
+        calls.append(1)
+        for hook in during_render:
+            hook()
+        return [{"aciklama": LONG_TEXT, "surum": len(calls)}]
+
+    @app.get("/api/dosyalar/{name}")
+    async def upload(name: str):
+        return {"icerik": LONG_TEXT}
+
+    @app.get("/api/ayarlar")
+    async def settings():
+        return {"aciklama": LONG_TEXT}
+
+    app.add_middleware(CatalogResponseCacheMiddleware, caches={"/api/filmler": cache})
+    app.add_middleware(ApiGZipMiddleware, minimum_size=1000)
+    app.state.during_render = during_render
+    return TestClient(app), cache, calls
+
+
+def test_gzip_body_is_compressed_once_and_served_from_cache(catalog):
+    client, cache, calls = catalog
+
+    first = client.get("/api/filmler", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/api/filmler", headers={"Accept-Encoding": "gzip"})
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert int(first.headers["content-length"]) < len(LONG_TEXT) / 10
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert second.json() == first.json()
+    assert len(calls) == 1
+
+
+def test_encodings_are_cached_separately(catalog):
+    client, cache, calls = catalog
+
+    compressed = client.get("/api/filmler", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/api/filmler", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["x-cache"] == "MISS"
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert len(calls) == 2
+
+
+def test_coherence_invalidation_of_one_movie_drops_cached_lists(catalog):
+    client, cache, calls = catalog
+    coherence = CacheCoherence(None, {"movies": [cache]})
+    client.get("/api/filmler")
+
+    # What a change stream update event for a single movie does
+    coherence.invalidate("movies", "film-id")
+    response = client.get("/api/filmler")
+
+    assert response.headers["x-cache"] == "MISS"
+    assert response.json()[0]["surum"] == 2
+
+
+def test_response_rendered_during_a_write_is_not_cached(catalog):
+    client, cache, calls = catalog
+    # The write lands, and clears the cache, while the response is being rendered
+    client.app.state.during_render.append(cache.clear)
+    client.get("/api/filmler")
+    client.app.state.during_render.clear()
+
+    response = client.get("/api/filmler")
+
+    assert response.headers["x-cache"] == "MISS"
+
+
+def test_uploads_are_not_compressed(catalog):
+    client, cache, calls = catalog
+
+    response = client.get("/api/dosyalar/film.mp4", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize("path", ["/api/filmler", "/api/ayarlar"])
+def test_wildcard_accept_encoding_is_compressed_on_every_path(catalog, path):
+    client, cache, calls = catalog
+
+    response = client.get(path, headers={"Accept-Encoding": "*"})
+
+    assert response.headers["content-encoding"] == "gzip"
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache("test", max_items=2)
+    cache.set("homepage", 1)
+    cache.set("ara-1", 2)
+    cache.get("homepage")
+
+    cache.set("ara-2", 3)
+
+    assert cache.get("homepage") == 1
+    assert cache.get("ara-1") is None
+
+
+def test_search_responses_have_their_own_cache():
+    search_cache = CACHEABLE_PATHS["/api/ara"]
+
+    assert search_cache is not CACHEABLE_PATHS["/api/filmler"]
+    assert search_cache in COHERENCE_COLLECTIONS["movies"]
+    assert search_cache in RESPONSE_CACHES["movies"]
@@ -0,0 +1,53 @@
+"""Job parameter validation; enqueueing is refused before anything reaches MongoDB."""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+from server import upload_path, validate_job_parameters  # noqa: E402
+
+MOVIE_ID = "6130804b-69f8-4d26-a9f4-123c1c11fc93"
+
+
+@pytest.mark.parametrize("tur, parametreler", [
+    ("film_dosyalari_temizle", {"movie_id": "*"}),
+    ("film_dosyalari_temizle", {"movie_id": f"{MOVIE_ID}*"}),
+    ("film_dosyalari_temizle", {}),
+    ("video_ozeti", {"dosya_adi": "../.env"}),
+    ("video_ozeti", {"dosya_adi": ".."}),
+    ("video_ozeti", {"dosya_adi": "/etc/passwd"}),
+    ("dosya_mutabakati", {"dizin": "/"}),
+    ("olmayan_is", {}),
+])
+def test_invalid_job_parameters_are_rejected(tur, parametreler):
+    with pytest.raises(ValueError):
+        validate_job_parameters(tur, parametreler)
+
+
+def test_valid_job_parameters_pass():
+    assert validate_job_parameters("film_dosyalari_temizle", {"movie_id": MOVIE_ID}) == {"movie_id": MOVIE_ID}
+    assert validate_job_parameters("video_ozeti", {"dosya_adi": f"{MOVIE_ID}_video.mp4"}) == {
+        "dosya_adi": f"{MOVIE_ID}_video.mp4"
+    }
+
+
+@pytest.mark.parametrize("dosya_adi", ["../server.py", "alt/../../server.py", "/etc/passwd"])
+def test_upload_path_stays_inside_upload_dir(dosya_adi):
+    with pytest.raises(ValueError):
+        upload_path(dosya_adi)
+
+
+def test_admin_job_endpoint_refuses_glob_movie_id():
+    server.rate_limit_backend._buckets.clear()
+    token = server.create_access_token({"sub": "admin", "rol": "admin"})
+
+    response = TestClient(server.app).post(
+        "/api/admin/isler",
+        json={"tur": "film_dosyalari_temizle", "parametreler": {"movie_id": "*"}},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 400
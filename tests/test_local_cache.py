@@ -0,0 +1,95 @@
+"""LocalCache generations: a read that races an invalidation must not be cached.
+
+The reads run against in-memory stand-ins for the movies and settings collections.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+from server import LocalCache  # noqa: E402
+
+MOVIE = {"id": "a", "baslik": "A", "aciklama": "", "tur": "Dram", "yil": 2020, "puan": 7}
+
+
+class FakeCollection:
+    """find_one and find over a list of documents; on_read runs while the query is in flight"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.on_read = []
+
+    def _read(self):
+        for hook in self.on_read:
+            hook()
+
+    async def find_one(self, query=None):
+        self._read()
+        matches = [doc for doc in self.documents if not query or doc["id"] == query["id"]]
+        return dict(matches[0]) if matches else None
+
+    async def find(self, query):
+        self._read()
+        for doc in self.documents:
+            if doc["id"] in query["id"]["$in"]:
+                yield dict(doc)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.movies = FakeCollection([MOVIE])
+        self.settings = FakeCollection([{"id": "site", "site_adi": "Ultra Sinema"}])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(server, "db", db)
+    server.movie_cache.clear()
+    server.settings_cache.clear()
+    return db
+
+
+def test_set_from_an_older_generation_is_dropped():
+    cache = LocalCache("test")
+    generation = cache.generation
+    cache.invalidate("a")
+
+    cache.set("a", "eski", generation)
+
+    assert cache.get("a") is None
+
+
+def test_get_movie_is_cached(db):
+    asyncio.run(server.get_movie("a"))
+
+    assert server.movie_cache.get("a").baslik == "A"
+
+
+def test_get_movie_read_during_invalidation_is_not_cached(db):
+    # The admin update lands, and invalidates, while the old document is being read
+    db.movies.on_read.append(lambda: server.movie_cache.invalidate("a"))
+
+    asyncio.run(server.get_movie("a"))
+
+    assert server.movie_cache.get("a") is None
+
+
+def test_lookup_read_during_invalidation_is_not_cached(db):
+    db.movies.on_read.append(lambda: server.movie_cache.invalidate("a"))
+
+    batch = asyncio.run(server.lookup_movies(["a"]))
+
+    assert [movie["id"] for movie in batch.filmler] == ["a"]
+    assert server.movie_cache.get("a") is None
+
+
+def test_settings_read_during_invalidation_are_not_cached(db):
+    db.settings.on_read.append(server.settings_cache.clear)
+
+    asyncio.run(server.get_settings())
+
+    assert server.settings_cache.get("site") is None
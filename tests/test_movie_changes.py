@@ -0,0 +1,22 @@
+"""Parameter validation of the delta sync endpoint; rejected before any MongoDB query."""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    server.rate_limit_backend._buckets.clear()
+    return TestClient(server.app)
+
+
+@pytest.mark.parametrize("limit", [0, -1, -2, 1001])
+def test_out_of_range_limit_is_rejected(client, limit):
+    response = client.get("/api/filmler/degisiklikler", params={"since": 0, "limit": limit})
+
+    assert response.status_code == 422
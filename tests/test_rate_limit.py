@@ -0,0 +1,135 @@
+"""RateLimitMiddleware and ConcurrencyLimiter; the login routes run against a stand-in users collection."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+from server import ConcurrencyLimiter  # noqa: E402
+
+
+class NoUsers:
+    async def find_one(self, query):
+        return None
+
+
+class FakeDatabase:
+    users = NoUsers()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "db", FakeDatabase())
+    server.rate_limit_backend._buckets.clear()
+    # Not entered as a context manager: no lifespan, so no MongoDB needed
+    return TestClient(server.app)
+
+
+def failed_admin_logins(client, count, headers=None):
+    return [
+        client.post("/api/admin/giris", json={"sifre": "yanlis"}, headers=headers)
+        for _ in range(count)
+    ]
+
+
+def test_sixth_login_from_one_client_is_rejected(client):
+    responses = failed_admin_logins(client, 6)
+
+    assert [r.status_code for r in responses] == [401] * 5 + [429]
+    assert int(responses[-1].headers["retry-after"]) >= 1
+
+
+def test_login_lockout_is_scoped_to_one_account(client):
+    failed_admin_logins(client, 5)
+
+    response = client.post("/api/giris", json={"kullanici_adi": "x", "sifre": "y"})
+
+    assert response.status_code == 401
+
+
+def test_login_account_names_are_normalized(client):
+    responses = [
+        client.post("/api/giris", json={"kullanici_adi": name, "sifre": "y"})
+        for name in ("ali", "Ali", " ALI", "ali ", "aLi", "ali")
+    ]
+
+    assert responses[-1].status_code == 429
+
+
+def test_one_client_trying_many_accounts_is_capped(client, monkeypatch):
+    monkeypatch.setitem(server.RATE_LIMITS, "giris_istemci", (1 / 60, 3))
+
+    responses = [
+        client.post("/api/giris", json={"kullanici_adi": f"kullanici{i}", "sifre": "y"})
+        for i in range(4)
+    ]
+
+    assert responses[-1].status_code == 429
+
+
+def test_memory_backend_evicts_least_recently_used_bucket():
+    async def main():
+        backend = server.MemoryRateLimitBackend(max_buckets=2)
+        await backend.take("a", 1, 1)
+        await backend.take("b", 1, 1)
+        await backend.take("a", 1, 1)
+
+        await backend.take("c", 1, 1)
+
+        assert list(backend._buckets) == ["a", "c"]
+
+    asyncio.run(main())
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_bucket(client, monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 1)
+
+    # The client varies the leftmost entry; our proxy appends the real address
+    responses = [
+        client.post("/api/admin/giris", json={"sifre": "yanlis"},
+                    headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"})
+        for i in range(6)
+    ]
+
+    assert responses[-1].status_code == 429
+
+
+def test_clients_behind_the_proxy_get_their_own_buckets(client, monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXY_HOPS", 1)
+    failed_admin_logins(client, 5, headers={"X-Forwarded-For": "203.0.113.7"})
+
+    response = client.post("/api/admin/giris", json={"sifre": "yanlis"},
+                           headers={"X-Forwarded-For": "203.0.113.8"})
+
+    assert response.status_code == 401
+
+
+def test_concurrency_limiter_queues_then_sheds():
+    async def main():
+        limiter = ConcurrencyLimiter(limit=1, queue=1)
+        assert await limiter.acquire(timeout=1)
+
+        queued = asyncio.create_task(limiter.acquire(timeout=1))
+        await asyncio.sleep(0)
+        # Slot taken and queue full: shed immediately
+        assert not await limiter.acquire(timeout=1)
+
+        limiter.release()
+        assert await queued
+        limiter.release()
+
+    asyncio.run(main())
+
+
+def test_concurrency_limiter_gives_up_after_timeout():
+    async def main():
+        limiter = ConcurrencyLimiter(limit=1, queue=1)
+        await limiter.acquire(timeout=1)
+
+        assert not await limiter.acquire(timeout=0.01)
+        assert limiter.waiting == 0
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""Startup readiness: index creation blocks it, a failing warm-up only delays it."""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+import server  # noqa: E402
+
+
+@pytest.fixture
+def startup_steps(monkeypatch):
+    """Stand-ins for the MongoDB work prepare() does, recording each call"""
+    calls = []
+
+    async def ensure_indexes():
+        calls.append("indexes")
+
+    async def migrate():
+        pass
+
+    async def warm_up():
+        calls.append("warm_up")
+        raise RuntimeError("/api/filmler ısınma isteği 500 döndü")
+
+    monkeypatch.setattr(server, "ensure_indexes", ensure_indexes)
+    monkeypatch.setattr(server, "migrate_normalized_fields", migrate)
+    monkeypatch.setattr(server.job_runner, "start", lambda: None)
+    monkeypatch.setattr(server, "warm_up", warm_up)
+    monkeypatch.setattr(server, "STARTUP_WARMUP", True)
+    monkeypatch.setattr(server, "WARMUP_ATTEMPTS", 3)
+    monkeypatch.setattr(server, "WARMUP_RETRY_DELAY", 0)
+    server.app.state.hazir = False
+    return calls
+
+
+def test_failing_warm_up_gives_up_and_reports_ready(startup_steps):
+    asyncio.run(server.prepare())
+
+    assert startup_steps == ["indexes"] + ["warm_up"] * 3
+    assert server.app.state.hazir is True
+
+
+def test_index_creation_is_retried_until_it_succeeds(startup_steps, monkeypatch):
+    failures = [RuntimeError("bağlantı yok")] * 5
+
+    async def ensure_indexes():
+        if failures:
+            raise failures.pop()
+
+    monkeypatch.setattr(server, "ensure_indexes", ensure_indexes)
+    monkeypatch.setattr(server, "STARTUP_WARMUP", False)
+
+    asyncio.run(server.prepare())
+
+    assert not failures
+    assert server.app.state.hazir is True